@@ -104,7 +104,7 @@ def is_array_value_field_name(obj: object) -> TypeGuard[ArrayValueFieldName]:
     return obj in _ARRAY_VALUE_FIELD_NAMES
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **util.DATACLASS_SLOTS_KWARGS)
 class WidgetMetadata(Generic[T]):
     """Metadata associated with a single widget. Immutable."""
 
@@ -21,12 +21,15 @@ from dataclasses import dataclass, field, replace
 from typing import (
     TYPE_CHECKING,
     Any,
+    Callable,
     Final,
+    ItemsView,
+    Iterable,
     Iterator,
     KeysView,
-    List,
     MutableMapping,
     Union,
+    ValuesView,
     cast,
 )
 
@@ -39,6 +42,7 @@ from streamlit.proto.WidgetStates_pb2 import WidgetState as WidgetStateProto
 from streamlit.proto.WidgetStates_pb2 import WidgetStates as WidgetStatesProto
 from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
 from streamlit.runtime.state.common import (
+    _ARRAY_VALUE_FIELD_NAMES,
     RegisterWidgetResult,
     T,
     ValueFieldName,
@@ -60,14 +64,14 @@ SCRIPT_RUN_WITHOUT_ERRORS_KEY: Final = (
 )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **util.DATACLASS_SLOTS_KWARGS)
 class Serialized:
     """A widget value that's serialized to a protobuf. Immutable."""
 
     value: WidgetStateProto
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **util.DATACLASS_SLOTS_KWARGS)
 class Value:
     """A widget value that's not serialized. Immutable."""
 
@@ -77,7 +81,7 @@ class Value:
 WState: TypeAlias = Union[Value, Serialized]
 
 
-@dataclass
+@dataclass(**util.DATACLASS_SLOTS_KWARGS)
 class WStates(MutableMapping[str, Any]):
     """A mapping of widget IDs to values. Widget values can be stored in
     serialized or deserialized form, but when values are retrieved from the
@@ -117,7 +121,7 @@ class WStates(MutableMapping[str, Any]):
             wstate.value.WhichOneof("value"),
         )
         value = (
-            wstate.value.__getattribute__(value_field_name)
+            getattr(wstate.value, value_field_name)
             if value_field_name  # Field name is None if the widget value was cleared
             else None
         )
@@ -130,13 +134,16 @@ class WStates(MutableMapping[str, Any]):
 
         deserialized = metadata.deserializer(value, metadata.id)
 
-        # Update metadata to reflect information from WidgetState proto
-        self.set_widget_metadata(
-            replace(
-                metadata,
-                value_type=value_field_name,
+        # Update metadata to reflect information from WidgetState proto.
+        # `replace` walks all dataclass fields and re-runs `__init__`, so we
+        # only pay for it when the value type actually changed.
+        if metadata.value_type != value_field_name:
+            self.set_widget_metadata(
+                replace(
+                    metadata,
+                    value_type=value_field_name,
+                )
             )
-        )
 
         self.states[k] = Value(deserialized)
         return deserialized
@@ -157,13 +164,14 @@ class WStates(MutableMapping[str, Any]):
         yield from self.states
 
     def keys(self) -> KeysView[str]:
-        return KeysView(self.states)
+        return self.states.keys()
 
-    def items(self) -> set[tuple[str, Any]]:  # type: ignore[override]
-        return {(k, self[k]) for k in self}
+    def items(self) -> ItemsView[str, Any]:
+        # Lazy view: values are only deserialized as they're iterated over.
+        return ItemsView(self)
 
-    def values(self) -> set[Any]:  # type: ignore[override]
-        return {self[wid] for wid in self}
+    def values(self) -> ValuesView[Any]:
+        return ValuesView(self)
 
     def update(self, other: WStates) -> None:  # type: ignore[override]
         """Copy all widget values and metadata from 'other' into this mapping,
@@ -172,10 +180,26 @@ class WStates(MutableMapping[str, Any]):
         self.states.update(other.states)
         self.widget_metadata.update(other.widget_metadata)
 
+    def _shallow_copy(self) -> WStates:
+        """Return a copy whose dicts can be modified independently of ours.
+
+        The Value and Serialized wrappers are immutable, so they're shared
+        with the copy rather than duplicated.
+        """
+        return WStates(self.states.copy(), self.widget_metadata.copy())
+
     def set_widget_from_proto(self, widget_state: WidgetStateProto) -> None:
         """Set a widget's serialized value, overwriting any existing value it has."""
         self[widget_state.id] = Serialized(widget_state)
 
+    def set_widgets_from_protos(
+        self, widget_states: Iterable[WidgetStateProto]
+    ) -> None:
+        """Set the serialized values of several widgets at once, overwriting any
+        existing values they have.
+        """
+        self.states.update((ws.id, Serialized(ws)) for ws in widget_states)
+
     def set_from_value(self, k: str, v: Any) -> None:
         """Set a widget's deserialized value, overwriting any existing value it has."""
         self[k] = Value(v)
@@ -184,17 +208,24 @@ class WStates(MutableMapping[str, Any]):
         """Set a widget's metadata, overwriting any existing metadata it has."""
         self.widget_metadata[widget_meta.id] = widget_meta
 
+    def set_widgets_metadata(self, widgets_meta: Iterable[WidgetMetadata[Any]]) -> None:
+        """Set the metadata of several widgets at once, overwriting any existing
+        metadata they have.
+        """
+        self.widget_metadata.update((meta.id, meta) for meta in widgets_meta)
+
     def remove_stale_widgets(
         self,
         active_widget_ids: set[str],
         fragment_ids_this_run: list[str] | None,
     ) -> None:
         """Remove widget state for stale widgets."""
+        get_metadata = self.widget_metadata.get
         self.states = {
             k: v
             for k, v in self.states.items()
             if not _is_stale_widget(
-                self.widget_metadata.get(k),
+                get_metadata(k),
                 active_widget_ids,
                 fragment_ids_this_run,
             )
@@ -217,6 +248,13 @@ class WStates(MutableMapping[str, Any]):
             return item.value
 
         # Widget value is not serialized: serialize it first!
+        return self._serialize_value(k, item.value)
+
+    def _serialize_value(self, k: str, value: Any) -> WidgetStateProto | None:
+        """Serialize the deserialized value of the widget with the given id.
+
+        If the widget's metadata is missing, return None.
+        """
         metadata = self.widget_metadata.get(k)
         if metadata is None:
             # We're missing the widget's metadata. (Can this happen?)
@@ -226,17 +264,11 @@ class WStates(MutableMapping[str, Any]):
         widget.id = k
 
         field = metadata.value_type
-        serialized = metadata.serializer(item.value)
-
-        if is_array_value_field_name(field):
-            arr = getattr(widget, field)
-            arr.data.extend(serialized)
-        elif field == "json_value":
-            setattr(widget, field, json.dumps(serialized))
-        elif field == "file_uploader_state_value":
-            widget.file_uploader_state_value.CopyFrom(serialized)
-        elif field == "string_trigger_value":
-            widget.string_trigger_value.CopyFrom(serialized)
+        serialized = metadata.serializer(value)
+
+        set_value_field = _VALUE_FIELD_SETTERS.get(field)
+        if set_value_field is not None:
+            set_value_field(widget, field, serialized)
         elif field is not None and serialized is not None:
             # If the field is None, the widget value was cleared
             # by the user and therefore is None. But we cannot
@@ -248,13 +280,17 @@ class WStates(MutableMapping[str, Any]):
 
     def as_widget_states(self) -> list[WidgetStateProto]:
         """Return a list of serialized widget values for each widget with a value."""
-        states = [
-            self.get_serialized(widget_id)
-            for widget_id in self.states.keys()
-            if self.get_serialized(widget_id)
-        ]
-        states = cast(List[WidgetStateProto], states)
-        return states
+        # We walk the states directly rather than going through get_serialized,
+        # so that each widget is looked up (and, if needed, serialized) once.
+        widget_states: list[WidgetStateProto] = []
+        for widget_id, wstate in self.states.items():
+            if isinstance(wstate, Serialized):
+                widget_states.append(wstate.value)
+            else:
+                serialized = self._serialize_value(widget_id, wstate.value)
+                if serialized is not None:
+                    widget_states.append(serialized)
+        return widget_states
 
     def call_callback(self, widget_id: str) -> None:
         """Call the given widget's callback and return the callback's
@@ -273,6 +309,37 @@ class WStates(MutableMapping[str, Any]):
         callback(*args, **kwargs)
 
 
+def _set_array_value_field(
+    widget: WidgetStateProto, field: str, serialized: Any
+) -> None:
+    # Array types are messages with data in a `data` field
+    getattr(widget, field).data.extend(serialized)
+
+
+def _set_json_value_field(
+    widget: WidgetStateProto, field: str, serialized: Any
+) -> None:
+    widget.json_value = json.dumps(serialized)
+
+
+def _set_message_value_field(
+    widget: WidgetStateProto, field: str, serialized: Any
+) -> None:
+    getattr(widget, field).CopyFrom(serialized)
+
+
+# Value fields that can't simply be assigned to, mapped to a function that
+# sets them on a WidgetState proto. All other value fields are set with setattr.
+_VALUE_FIELD_SETTERS: Final[
+    dict[str | None, Callable[[WidgetStateProto, str, Any], None]]
+] = {
+    **{field: _set_array_value_field for field in _ARRAY_VALUE_FIELD_NAMES},
+    "json_value": _set_json_value_field,
+    "file_uploader_state_value": _set_message_value_field,
+    "string_trigger_value": _set_message_value_field,
+}
+
+
 def _missing_key_error_message(key: str) -> str:
     return (
         f'st.session_state has no key "{key}". Did you forget to initialize it? '
@@ -280,7 +347,7 @@ def _missing_key_error_message(key: str) -> str:
     )
 
 
-@dataclass
+@dataclass(**util.DATACLASS_SLOTS_KWARGS)
 class KeyIdMapper:
     """A mapping of user-provided keys to element IDs.
     It also maps element IDs to user-provided keys so that this reverse mapping
@@ -325,8 +392,7 @@ class KeyIdMapper:
         self._id_key_mapping.clear()
 
     def delete(self, key: str):
-        widget_id = self._key_id_mapping[key]
-        del self._key_id_mapping[key]
+        widget_id = self._key_id_mapping.pop(key)
         del self._id_key_mapping[widget_id]
 
 
@@ -384,6 +450,24 @@ class SessionState:
         self._new_session_state.clear()
         self._new_widget_state.clear()
 
+    def _snapshot(self) -> SessionState:
+        """Return a copy of this SessionState whose internal dicts can be
+        modified (e.g. by `_compact_state`) without affecting this one.
+
+        Unlike `deepcopy`, the stored values themselves are shared with the
+        copy, not duplicated.
+        """
+        return SessionState(
+            _old_state=self._old_state.copy(),
+            _new_session_state=self._new_session_state.copy(),
+            _new_widget_state=self._new_widget_state._shallow_copy(),
+            _key_id_mapper=KeyIdMapper(
+                self._key_id_mapper._key_id_mapping.copy(),
+                self._key_id_mapper._id_key_mapping.copy(),
+            ),
+            query_params=deepcopy(self.query_params),
+        )
+
     def clear(self) -> None:
         """Reset self completely, clearing all current and old values."""
         self._old_state.clear()
@@ -465,16 +549,18 @@ class SessionState:
         """
         assert user_key is not None or widget_id is not None
 
-        if user_key is not None:
-            try:
-                return self._new_session_state[user_key]
-            except KeyError:
-                pass
+        # Misses are the common case here (e.g. every widget id is looked up in
+        # _new_session_state first), so we check for membership instead of
+        # raising and catching a KeyError for each dict we fall through.
+        if user_key is not None and user_key in self._new_session_state:
+            return self._new_session_state[user_key]
 
-        if widget_id is not None:
+        if widget_id is not None and widget_id in self._new_widget_state.states:
             try:
                 return self._new_widget_state[widget_id]
             except KeyError:
+                # The widget has a serialized value but no metadata to
+                # deserialize it with.
                 pass
 
         # Typically, there won't be both a widget id and an associated state key in
@@ -484,17 +570,11 @@ class SessionState:
         # The opposite case shouldn't happen, because setting the value of a widget
         # through session state will result in the next widget state reflecting that
         # value.
-        if widget_id is not None:
-            try:
-                return self._old_state[widget_id]
-            except KeyError:
-                pass
+        if widget_id is not None and widget_id in self._old_state:
+            return self._old_state[widget_id]
 
-        if user_key is not None:
-            try:
-                return self._old_state[user_key]
-            except KeyError:
-                pass
+        if user_key is not None and user_key in self._old_state:
+            return self._old_state[user_key]
 
         # We'll never get here
         raise KeyError
@@ -543,8 +623,7 @@ class SessionState:
 
     def set_widgets_from_proto(self, widget_states: WidgetStatesProto) -> None:
         """Set the value of all widgets represented in the given WidgetStatesProto."""
-        for state in widget_states.widgets:
-            self._new_widget_state.set_widget_from_proto(state)
+        self._new_widget_state.set_widgets_from_protos(widget_states.widgets)
 
     def on_script_will_rerun(self, latest_widget_states: WidgetStatesProto) -> None:
         """Called by ScriptRunner before its script re-runs.
@@ -620,22 +699,24 @@ class SessionState:
         if ctx is None:
             return
 
+        fragment_ids_this_run = ctx.fragment_ids_this_run
         self._new_widget_state.remove_stale_widgets(
             active_widget_ids,
-            ctx.fragment_ids_this_run,
+            fragment_ids_this_run,
         )
 
         # Remove entries from _old_state corresponding to
         # widgets not in widget_ids.
+        get_metadata = self._new_widget_state.widget_metadata.get
         self._old_state = {
             k: v
             for k, v in self._old_state.items()
             if (
                 not is_element_id(k)
                 or not _is_stale_widget(
-                    self._new_widget_state.widget_metadata.get(k),
+                    get_metadata(k),
                     active_widget_ids,
-                    ctx.fragment_ids_this_run,
+                    fragment_ids_this_run,
                 )
             )
         }
@@ -680,14 +761,14 @@ class SessionState:
             # This is the first time the widget is registered, so we save its
             # value in widget state.
             deserializer = metadata.deserializer
-            initial_widget_value = deepcopy(deserializer(None, metadata.id))
+            initial_widget_value = _copy_widget_value(deserializer(None, metadata.id))
             self._new_widget_state.set_from_value(widget_id, initial_widget_value)
 
         # Get the current value of the widget for use as its return value.
         # We return a copy, so that reference types can't be accidentally
         # mutated by user code.
         widget_value = cast(T, self[widget_id])
-        widget_value = deepcopy(widget_value)
+        widget_value = _copy_widget_value(widget_value)
 
         # widget_value_changed indicates to the caller that the widget's
         # current value is different from what is in the frontend.
@@ -718,10 +799,13 @@ class SessionState:
         pickleability by just trying it.
         """
         for k in self:
+            value = self[k]
+            if type(value) in _IMMUTABLE_SCALAR_TYPES:
+                continue
             try:
-                pickle.dumps(self[k])
+                pickle.dumps(value)
             except Exception as e:
-                err_msg = f"""Cannot serialize the value (of type `{type(self[k])}`) of '{k}' in st.session_state.
+                err_msg = f"""Cannot serialize the value (of type `{type(value)}`) of '{k}' in st.session_state.
                 Streamlit has been configured to use [pickle](https://docs.python.org/3/library/pickle.html) to
                 serialize session_state values. Please convert the value to a pickle-serializable type. To learn
                 more about this behavior, see [our docs](https://docs.streamlit.io/knowledge-base/using-streamlit/serializable-session-state). """
@@ -736,6 +820,25 @@ class SessionState:
             self._check_serializable()
 
 
+# Exact builtin scalar types. Their values are immutable and can always be
+# pickled, so they never need to be copied or checked for serializability.
+# Subclasses are deliberately excluded, since they may customize both.
+_IMMUTABLE_SCALAR_TYPES: Final = frozenset(
+    {str, int, float, bool, bytes, complex, type(None)}
+)
+
+
+def _copy_widget_value(value: T) -> T:
+    """Return a deep copy of the given widget value.
+
+    Immutable scalars (the most common widget values) are returned as-is,
+    which is what deepcopy does for them too, minus the overhead.
+    """
+    if type(value) in _IMMUTABLE_SCALAR_TYPES:
+        return value
+    return deepcopy(value)
+
+
 def _is_internal_key(key: str) -> bool:
     return key.startswith(STREAMLIT_INTERNAL_KEY_PREFIX)
 
@@ -745,16 +848,14 @@ def _is_stale_widget(
     active_widget_ids: set[str],
     fragment_ids_this_run: list[str] | None,
 ) -> bool:
-    if not metadata:
-        return True
-    elif metadata.id in active_widget_ids:
-        return False
-    # If we're running 1 or more fragments, but this widget is unrelated to any of the
-    # fragments that we're running, then it should not be marked as stale as its value
-    # may still be needed for a future fragment run or full script run.
-    elif fragment_ids_this_run and metadata.fragment_id not in fragment_ids_this_run:
-        return False
-    return True
+    # A widget without metadata is always stale. Otherwise, it's stale if it wasn't
+    # active in this run - unless we're running 1 or more fragments and this widget
+    # is unrelated to any of them, in which case its value may still be needed for
+    # a future fragment run or full script run.
+    return metadata is None or (
+        metadata.id not in active_widget_ids
+        and (not fragment_ids_this_run or metadata.fragment_id in fragment_ids_this_run)
+    )
 
 
 @dataclass
@@ -28,6 +28,13 @@ HASHLIB_KWARGS: dict[str, Any] = (
     {"usedforsecurity": False} if sys.version_info >= (3, 9) else {}
 )
 
+# The slots argument to dataclass is only available for python versions 3.10
+# and higher. Slotted dataclasses drop the per-instance __dict__, which saves
+# memory and speeds up attribute access for small, frequently created objects.
+DATACLASS_SLOTS_KWARGS: dict[str, Any] = (
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+)
+
 
 def memoize(func: Callable[..., Any]) -> Callable[..., Any]:
     """Decorator to memoize the result of a no-args func."""
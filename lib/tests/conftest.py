@@ -75,6 +75,24 @@ def pytest_addoption(parser: pytest.Parser):
     )
 
 
+def pytest_report_header(config: pytest.Config) -> list[str]:
+    from google.protobuf.internal import api_implementation
+
+    # Widget state handling builds and parses protos in nearly every test, and
+    # the pure-python protobuf backend is much slower than the compiled ones
+    # (upb / cpp). Surface which one is in use so a silent fallback to it is
+    # visible in the test output.
+    implementation = api_implementation.Type()
+    header = [f"protobuf implementation: {implementation}"]
+    if implementation == "python":
+        header.append(
+            "WARNING: using the pure-python protobuf implementation, which is "
+            "considerably slower. Install a protobuf wheel for your platform to "
+            "use the compiled implementation."
+        )
+    return header
+
+
 def pytest_configure(config: pytest.Config):
     config.addinivalue_line(
         "markers",
@@ -16,6 +16,7 @@ from __future__ import annotations
 
 import threading
 import unittest
+from typing import Any, Callable
 
 from parameterized import parameterized
 
@@ -32,8 +33,30 @@ from streamlit.runtime.scriptrunner_utils.script_run_context import (
 )
 from streamlit.runtime.state import SafeSessionState, SessionState
 
+_USER_INFO = {"email": "test@example.com"}
+
+# Shared messages for the tests that only enqueue them. ctx.enqueue writes the
+# active script hash into the message metadata, which these tests don't check.
+_PAGE_CONFIG_MSG = ForwardMsg()
+_PAGE_CONFIG_MSG.page_config_changed.title = "foo"
+
+_OTHER_PAGE_CONFIG_MSG = ForwardMsg()
+_OTHER_PAGE_CONFIG_MSG.page_config_changed.title = "bar"
+
+_MARKDOWN_MSG = ForwardMsg()
+_MARKDOWN_MSG.delta.new_element.markdown.body = "foo"
+
+
+def _noop_enqueue(_msg: ForwardMsg) -> None:
+    pass
+
 
 class ScriptRunContextTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # None of these tests upload files, so they can share one manager.
+        cls.uploaded_file_mgr = MemoryUploadedFileManager("/mock/upload")
+
     def setUp(self):
         try:
             # clear context variable as it otherwise would be carried over between tests
@@ -41,121 +64,66 @@ class ScriptRunContextTest(unittest.TestCase):
         except AttributeError:
             pass
 
-    def test_set_page_config_immutable(self):
-        """st.set_page_config must be called at most once"""
-
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
-
-        msg = ForwardMsg()
-        msg.page_config_changed.title = "foo"
-
-        ctx.enqueue(msg)
-        with self.assertRaises(StreamlitAPIException):
-            ctx.enqueue(msg)
-
-    def test_set_page_config_first(self):
-        """st.set_page_config must be called before other st commands
-        when the script has been marked as started"""
-
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
+    def _create_script_run_ctx(
+        self,
+        enqueue: Callable[[ForwardMsg], None] = _noop_enqueue,
+        **kwargs: Any,
+    ) -> ScriptRunContext:
+        """Create a ScriptRunContext for testing. Keyword arguments override
+        the default constructor arguments.
+        """
+        ctx_kwargs: dict[str, Any] = {
+            "session_id": "TestSessionID",
+            "_enqueue": enqueue,
+            "query_string": "",
+            "session_state": SafeSessionState(SessionState(), lambda: None),
+            "uploaded_file_mgr": self.uploaded_file_mgr,
+            "main_script_path": "",
+            "user_info": _USER_INFO,
+            "fragment_storage": MemoryFragmentStorage(),
+            "pages_manager": PagesManager(""),
+        }
+        ctx_kwargs.update(kwargs)
+        return ScriptRunContext(**ctx_kwargs)
 
-        ctx.on_script_start()
-
-        markdown_msg = ForwardMsg()
-        markdown_msg.delta.new_element.markdown.body = "foo"
-
-        msg = ForwardMsg()
-        msg.page_config_changed.title = "foo"
+    @parameterized.expand(
+        [
+            # st.set_page_config must be called at most once
+            ("immutable", False, [_PAGE_CONFIG_MSG], False, _PAGE_CONFIG_MSG, True),
+            # st.set_page_config must be called before other st commands
+            # when the script has been marked as started
+            ("first", True, [_MARKDOWN_MSG], False, _PAGE_CONFIG_MSG, True),
+            # st.set_page_config cannot be called twice
+            ("twice", True, [_PAGE_CONFIG_MSG], False, _OTHER_PAGE_CONFIG_MSG, True),
+            # st.set_page_config should be allowed after a rerun
+            ("after_reset", True, [_PAGE_CONFIG_MSG], True, _PAGE_CONFIG_MSG, False),
+        ]
+    )
+    def test_set_page_config(
+        self,
+        _name: str,
+        start_script: bool,
+        pre_msgs: list[ForwardMsg],
+        reset: bool,
+        final_msg: ForwardMsg,
+        should_raise: bool,
+    ):
+        ctx = self._create_script_run_ctx()
+        if start_script:
+            ctx.on_script_start()
 
-        ctx.enqueue(markdown_msg)
-        with self.assertRaises(StreamlitAPIException):
+        for msg in pre_msgs:
             ctx.enqueue(msg)
 
-    def test_disallow_set_page_config_twice(self):
-        """st.set_page_config cannot be called twice"""
-
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
-
-        ctx.on_script_start()
-
-        msg = ForwardMsg()
-        msg.page_config_changed.title = "foo"
-        ctx.enqueue(msg)
-
-        with self.assertRaises(StreamlitAPIException):
-            same_msg = ForwardMsg()
-            same_msg.page_config_changed.title = "bar"
-            ctx.enqueue(same_msg)
-
-    def test_set_page_config_reset(self):
-        """st.set_page_config should be allowed after a rerun"""
-
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
-
-        ctx.on_script_start()
-
-        msg = ForwardMsg()
-        msg.page_config_changed.title = "foo"
-
-        ctx.enqueue(msg)
-        ctx.reset()
-        try:
+        if reset:
+            ctx.reset()
             ctx.on_script_start()
-            ctx.enqueue(msg)
-        except StreamlitAPIException:
-            self.fail("set_page_config should have succeeded after reset!")
+
+        if should_raise:
+            with self.assertRaises(StreamlitAPIException):
+                ctx.enqueue(final_msg)
+        else:
+            ctx.enqueue(final_msg)
 
     def test_active_script_hash(self):
         """ensures active script hash is set correctly when enqueueing messages"""
@@ -163,20 +131,7 @@ class ScriptRunContextTest(unittest.TestCase):
         fake_path = "my/custom/script/path"
         pg_mgr = PagesManager(fake_path)
 
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=pg_mgr,
-        )
+        ctx = self._create_script_run_ctx(pages_manager=pg_mgr)
         ctx.reset(page_script_hash="main_script_hash")
 
         ctx.on_script_start()
@@ -207,20 +162,7 @@ class ScriptRunContextTest(unittest.TestCase):
     def test_both_query_params_used(
         self, experimental_used, production_used, should_raise
     ):
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
+        ctx = self._create_script_run_ctx()
         ctx._experimental_query_params_used = experimental_used
         ctx._production_query_params_used = production_used
 
@@ -231,38 +173,12 @@ class ScriptRunContextTest(unittest.TestCase):
             ctx.ensure_single_query_api_used()
 
     def test_mark_experimental_query_params_used_sets_true(self):
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
+        ctx = self._create_script_run_ctx()
         ctx.mark_experimental_query_params_used()
         assert ctx._experimental_query_params_used is True
 
     def test_mark_production_query_params_used_sets_true(self):
-        def fake_enqueue(msg):
-            return None
-
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
+        ctx = self._create_script_run_ctx()
         ctx.mark_production_query_params_used()
         assert ctx._production_query_params_used is True
 
@@ -279,17 +195,7 @@ class ScriptRunContextTest(unittest.TestCase):
         def fake_enqueue(msg: ForwardMsg):
             fake_enqueue_result["msg"] = msg
 
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=fake_enqueue,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@example.com"},
-            fragment_storage=MemoryFragmentStorage(),
-            pages_manager=PagesManager(""),
-        )
+        ctx = self._create_script_run_ctx(fake_enqueue)
         add_script_run_ctx(ctx=ctx)
         msg = ForwardMsg()
         msg.delta.new_element.markdown.body = "foo"
@@ -306,43 +212,24 @@ class ScriptRunContextTest(unittest.TestCase):
         def fake_enqueue(msg: ForwardMsg):
             fake_enqueue_result["msg"] = msg
 
-            ctx = ScriptRunContext(
-                session_id="TestSessionID",
-                _enqueue=fake_enqueue,
-                query_string="",
-                session_state=SafeSessionState(SessionState(), lambda: None),
-                uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-                main_script_path="",
-                user_info={"email": "test@example.com"},
-                fragment_storage=MemoryFragmentStorage(),
-                pages_manager=PagesManager(""),
-                current_fragment_id="my_fragment_id",
-            )
-            add_script_run_ctx(ctx=ctx)
-            msg = ForwardMsg()
-            msg.delta.new_element.markdown.body = "foo"
-            enqueue_message(msg)
-            self.assertIsNotNone(fake_enqueue_result)
-            self.assertEqual(
-                fake_enqueue_result["msg"].delta.new_element.markdown.body,
-                msg.delta.new_element.markdown.body,
-            )
-            self.assertEqual(
-                fake_enqueue_result["msg"].delta.fragment_id, "my_fragment_id"
-            )
+        ctx = self._create_script_run_ctx(
+            fake_enqueue, current_fragment_id="my_fragment_id"
+        )
+        add_script_run_ctx(ctx=ctx)
+        msg = ForwardMsg()
+        msg.delta.new_element.markdown.body = "foo"
+        enqueue_message(msg)
+        self.assertIsNotNone(fake_enqueue_result)
+        self.assertEqual(
+            fake_enqueue_result["msg"].delta.new_element.markdown.body,
+            msg.delta.new_element.markdown.body,
+        )
+        self.assertEqual(fake_enqueue_result["msg"].delta.fragment_id, "my_fragment_id")
 
     def test_run_with_active_hash(self):
         """Ensure the active script is set correctly"""
         pages_manager = PagesManager("")
-        ctx = ScriptRunContext(
-            session_id="TestSessionID",
-            _enqueue=lambda msg: None,
-            query_string="",
-            session_state=SafeSessionState(SessionState(), lambda: None),
-            uploaded_file_mgr=MemoryUploadedFileManager("/mock/upload"),
-            main_script_path="",
-            user_info={"email": "test@test.com"},
-            fragment_storage=MemoryFragmentStorage(),
+        ctx = self._create_script_run_ctx(
             pages_manager=pages_manager,
             current_fragment_id="my_fragment_id",
         )
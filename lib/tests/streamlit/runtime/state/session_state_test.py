@@ -16,8 +16,10 @@
 
 from __future__ import annotations
 
+import json
+import math
+import sys
 import unittest
-from copy import deepcopy
 from datetime import date, datetime, timedelta
 from typing import Any
 from unittest.mock import MagicMock, patch
@@ -50,11 +52,30 @@ from streamlit.testing.v1.app_test import AppTest
 from tests.delta_generator_test_case import DeltaGeneratorTestCase
 from tests.testutil import patch_config_options
 
+# Pre-serialized WidgetState payloads that tests parse into fresh protos
+# instead of building them field by field.
+_INT_WIDGET_STATE_BYTES = WidgetStateProto(int_value=7).SerializeToString()
+_INT_ARRAY_WIDGET_STATE_BYTES = WidgetStateProto(
+    int_array_value={"data": [1, 2, 3, 4]}
+).SerializeToString()
+
 
 def identity(x):
     return x
 
 
+def _identity_deser(x, s):
+    return x
+
+
+def _str_deser(x, s):
+    return str(x)
+
+
+def _int_ser(x):
+    return int(x)
+
+
 def _raw_session_state() -> SessionState:
     """Return the SessionState instance within the current ScriptRunContext's
     SafeSessionState wrapper.
@@ -63,9 +84,12 @@ def _raw_session_state() -> SessionState:
 
 
 class WStateTests(unittest.TestCase):
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        # Build the shared WStates once; each test gets its own shallow copy,
+        # whose dicts it can freely modify.
         wstates = WStates()
-        self.wstates = wstates
+        cls._prototype = wstates
 
         widget_state = WidgetStateProto()
         widget_state.id = "widget_id_1"
@@ -74,8 +98,8 @@ class WStateTests(unittest.TestCase):
         wstates.set_widget_metadata(
             WidgetMetadata(
                 id="widget_id_1",
-                deserializer=lambda x, s: str(x),
-                serializer=lambda x: int(x),
+                deserializer=_str_deser,
+                serializer=_int_ser,
                 value_type="int_value",
             )
         )
@@ -84,12 +108,15 @@ class WStateTests(unittest.TestCase):
         wstates.set_widget_metadata(
             WidgetMetadata(
                 id="widget_id_2",
-                deserializer=lambda x, s: x,
+                deserializer=_identity_deser,
                 serializer=identity,
                 value_type="int_value",
             )
         )
 
+    def setUp(self):
+        self.wstates = self._prototype._shallow_copy()
+
     def test_get_from_json_value(self):
         widget_state = WidgetStateProto()
         widget_state.id = "widget_id_3"
@@ -99,7 +126,7 @@ class WStateTests(unittest.TestCase):
         self.wstates.set_widget_metadata(
             WidgetMetadata(
                 id="widget_id_3",
-                deserializer=lambda x, s: x,
+                deserializer=_identity_deser,
                 serializer=identity,
                 value_type="json_value",
             )
@@ -138,10 +165,12 @@ class WStateTests(unittest.TestCase):
         assert self.wstates.keys() == {"widget_id_1", "widget_id_2"}
 
     def test_items(self):
-        assert self.wstates.items() == {("widget_id_1", "5"), ("widget_id_2", 5)}
+        assert set(self.wstates.items()) == {("widget_id_1", "5"), ("widget_id_2", 5)}
+        assert ("widget_id_2", 5) in self.wstates.items()
+        assert ("nonexistent_widget_id", 5) not in self.wstates.items()
 
     def test_values(self):
-        assert self.wstates.values() == {"5", 5}
+        assert set(self.wstates.values()) == {"5", 5}
 
     def test_remove_stale_widgets(self):
         self.wstates.remove_stale_widgets({"widget_id_1"}, None)
@@ -154,20 +183,24 @@ class WStateTests(unittest.TestCase):
             ("widget_id_2", "my_fragment_id"),
             ("widget_id_3", "some_other_fragment_id"),
         ]
-        for widget_id, fragment_id in widget_data:
-            widget_state1 = WidgetStateProto()
-            widget_state1.id = widget_id
-            widget_state1.int_value = 7
-            self.wstates.set_widget_from_proto(widget_state1)
-            self.wstates.set_widget_metadata(
+        widget_states = []
+        for widget_id, _ in widget_data:
+            widget_state = WidgetStateProto.FromString(_INT_WIDGET_STATE_BYTES)
+            widget_state.id = widget_id
+            widget_states.append(widget_state)
+        self.wstates.set_widgets_from_protos(widget_states)
+        self.wstates.set_widgets_metadata(
+            [
                 WidgetMetadata(
                     id=widget_id,
-                    deserializer=lambda x, s: x,
+                    deserializer=_identity_deser,
                     serializer=identity,
                     value_type="int_value",
                     fragment_id=fragment_id,
                 )
-            )
+                for widget_id, fragment_id in widget_data
+            ]
+        )
 
         self.wstates.remove_stale_widgets({"widget_id_1"}, {"my_fragment_id"})
         assert "widget_id_1" in self.wstates  # Active widget in fragment, not removed
@@ -192,14 +225,13 @@ class WStateTests(unittest.TestCase):
         assert serialized.int_value == 5
 
     def test_get_serialized_array_value(self):
-        widget_state = WidgetStateProto()
+        widget_state = WidgetStateProto.FromString(_INT_ARRAY_WIDGET_STATE_BYTES)
         widget_state.id = "widget_id_1"
-        widget_state.int_array_value.data.extend([1, 2, 3, 4])
         self.wstates.set_widget_from_proto(widget_state)
         self.wstates.set_widget_metadata(
             WidgetMetadata(
                 id="widget_id_1",
-                deserializer=lambda x, s: x,
+                deserializer=_identity_deser,
                 serializer=identity,
                 value_type="int_array_value",
             )
@@ -214,7 +246,7 @@ class WStateTests(unittest.TestCase):
         self.wstates.set_widget_metadata(
             WidgetMetadata(
                 id="widget_id_3",
-                deserializer=lambda x, s: x,
+                deserializer=_identity_deser,
                 serializer=identity,
                 value_type="json_value",
             )
@@ -224,6 +256,56 @@ class WStateTests(unittest.TestCase):
         assert serialized.id == "widget_id_3"
         assert serialized.json_value == '{"foo": 5}'
 
+    def test_get_serialized_json_value_non_str_keys(self):
+        self.wstates.set_from_value("widget_id_3", {1: 5})
+        self.wstates.set_widget_metadata(
+            WidgetMetadata(
+                id="widget_id_3",
+                deserializer=_identity_deser,
+                serializer=identity,
+                value_type="json_value",
+            )
+        )
+
+        serialized = self.wstates.get_serialized("widget_id_3")
+        assert json.loads(serialized.json_value) == {"1": 5}
+
+    def test_json_value_non_finite_floats_roundtrip(self):
+        value = [float("nan"), float("inf"), float("-inf")]
+        self.wstates.set_from_value("widget_id_3", value)
+        metadata = WidgetMetadata(
+            id="widget_id_3",
+            deserializer=_identity_deser,
+            serializer=identity,
+            value_type="json_value",
+        )
+        self.wstates.set_widget_metadata(metadata)
+
+        serialized = self.wstates.get_serialized("widget_id_3")
+        assert serialized.json_value == "[NaN, Infinity, -Infinity]"
+
+        wstates = WStates()
+        wstates.set_widget_from_proto(serialized)
+        wstates.set_widget_metadata(metadata)
+        nan, inf, neg_inf = wstates["widget_id_3"]
+        assert math.isnan(nan)
+        assert inf == float("inf")
+        assert neg_inf == float("-inf")
+
+    def test_get_serialized_json_value_rejects_datetime(self):
+        self.wstates.set_from_value("widget_id_3", datetime(2024, 1, 1))
+        self.wstates.set_widget_metadata(
+            WidgetMetadata(
+                id="widget_id_3",
+                deserializer=_identity_deser,
+                serializer=identity,
+                value_type="json_value",
+            )
+        )
+
+        with pytest.raises(TypeError):
+            self.wstates.get_serialized("widget_id_3")
+
     def test_as_widget_states(self):
         widget_states = self.wstates.as_widget_states()
         assert len(widget_states) == 2
@@ -232,11 +314,23 @@ class WStateTests(unittest.TestCase):
         assert widget_states[1].id == "widget_id_2"
         assert widget_states[1].int_value == 5
 
+    def test_as_widget_states_serializes_once(self):
+        with patch.object(
+            WStates,
+            "_serialize_value",
+            autospec=True,
+            side_effect=WStates._serialize_value,
+        ) as serialize_value:
+            self.wstates.as_widget_states()
+
+        # Only widget_id_2 is held in deserialized form.
+        serialize_value.assert_called_once_with(self.wstates, "widget_id_2", 5)
+
     def test_call_callback(self):
         metadata = WidgetMetadata(
             id="widget_id_1",
-            deserializer=lambda x, s: str(x),
-            serializer=lambda x: int(x),
+            deserializer=_str_deser,
+            serializer=_int_ser,
             value_type="int_value",
             callback=MagicMock(),
             callback_args=(1,),
@@ -247,6 +341,19 @@ class WStateTests(unittest.TestCase):
 
         metadata.callback.assert_called_once_with(1, y=2)
 
+    @unittest.skipIf(
+        sys.version_info < (3, 10),
+        "Slotted dataclasses are only available for python >= 3.10",
+    )
+    def test_widget_state_containers_are_slotted(self):
+        """Widget state containers should not carry a per-instance __dict__."""
+        assert not hasattr(self.wstates, "__dict__")
+        metadata = self.wstates.widget_metadata["widget_id_1"]
+        assert not hasattr(metadata, "__dict__")
+        assert not hasattr(self.wstates.states["widget_id_1"], "__dict__")
+        assert not hasattr(self.wstates.states["widget_id_2"], "__dict__")
+        assert not hasattr(KeyIdMapper(), "__dict__")
+
 
 @patch("streamlit.runtime.Runtime.exists", MagicMock(return_value=True))
 class SessionStateUpdateTest(DeltaGeneratorTestCase):
@@ -375,40 +482,38 @@ def test_serializable_check_off():
         assert not at.exception
 
 
-def check_roundtrip(widget_id: str, value: Any) -> None:
+def _batch_check_roundtrip(widget_values: list[tuple[str, Any]]) -> None:
+    """Assert that each (widget key, value) pair survives a serde roundtrip."""
     session_state = _raw_session_state()
-    wid = session_state._get_widget_id(widget_id)
-    metadata = session_state._new_widget_state.widget_metadata[wid]
-    serializer = metadata.serializer
-    deserializer = metadata.deserializer
+    widget_metadata = session_state._new_widget_state.widget_metadata
 
-    assert deserializer(serializer(value), "") == value
+    for widget_id, value in widget_values:
+        metadata = widget_metadata[session_state._get_widget_id(widget_id)]
+        assert metadata.deserializer(metadata.serializer(value), "") == value, widget_id
 
 
 @patch("streamlit.runtime.Runtime.exists", MagicMock(return_value=True))
 class SessionStateSerdeTest(DeltaGeneratorTestCase):
     def test_checkbox_serde(self):
         cb = st.checkbox("cb", key="cb")
-        check_roundtrip("cb", cb)
+        _batch_check_roundtrip([("cb", cb)])
 
     def test_color_picker_serde(self):
         cp = st.color_picker("cp", key="cp")
-        check_roundtrip("cp", cp)
+        _batch_check_roundtrip([("cp", cp)])
 
     def test_date_input_serde(self):
         date = st.date_input("date", key="date")
-        check_roundtrip("date", date)
-
         date_interval = st.date_input(
             "date_interval",
             value=[datetime.now().date(), datetime.now().date() + timedelta(days=1)],
             key="date_interval",
         )
-        check_roundtrip("date_interval", date_interval)
+        _batch_check_roundtrip([("date", date), ("date_interval", date_interval)])
 
     def test_feedback_serde(self):
         feedback = st.feedback("stars", key="feedback")
-        check_roundtrip("feedback", feedback)
+        _batch_check_roundtrip([("feedback", feedback)])
 
     @patch("streamlit.elements.widgets.file_uploader._get_upload_files")
     def test_file_uploader_serde(self, get_upload_files_patch):
@@ -422,131 +527,132 @@ class SessionStateSerdeTest(DeltaGeneratorTestCase):
         get_upload_files_patch.return_value = uploaded_files
 
         uploaded_file = st.file_uploader("file_uploader", key="file_uploader")
-        check_roundtrip("file_uploader", uploaded_file)
+        _batch_check_roundtrip([("file_uploader", uploaded_file)])
 
     def test_multiselect_serde(self):
         multiselect = st.multiselect(
             "multiselect", options=["a", "b", "c"], key="multiselect"
         )
-        check_roundtrip("multiselect", multiselect)
-
         multiselect_multiple = st.multiselect(
             "multiselect_multiple",
             options=["a", "b", "c"],
             default=["b", "c"],
             key="multiselect_multiple",
         )
-        check_roundtrip("multiselect_multiple", multiselect_multiple)
+        _batch_check_roundtrip(
+            [
+                ("multiselect", multiselect),
+                ("multiselect_multiple", multiselect_multiple),
+            ]
+        )
 
     def test_number_input_serde(self):
         number = st.number_input("number", key="number")
-        check_roundtrip("number", number)
-
         number_int = st.number_input("number_int", value=16777217, key="number_int")
-        check_roundtrip("number_int", number_int)
+        _batch_check_roundtrip([("number", number), ("number_int", number_int)])
 
     def test_radio_input_serde(self):
         radio = st.radio("radio", options=["a", "b", "c"], key="radio")
-        check_roundtrip("radio", radio)
-
         radio_nondefault = st.radio(
             "radio_nondefault",
             options=["a", "b", "c"],
             index=1,
             key="radio_nondefault",
         )
-        check_roundtrip("radio_nondefault", radio_nondefault)
+        _batch_check_roundtrip(
+            [("radio", radio), ("radio_nondefault", radio_nondefault)]
+        )
 
     def test_selectbox_serde(self):
         selectbox = st.selectbox("selectbox", options=["a", "b", "c"], key="selectbox")
-        check_roundtrip("selectbox", selectbox)
+        _batch_check_roundtrip([("selectbox", selectbox)])
 
     def test_select_slider_serde(self):
         select_slider = st.select_slider(
             "select_slider", options=["a", "b", "c"], key="select_slider"
         )
-        check_roundtrip("select_slider", select_slider)
-
         select_slider_range = st.select_slider(
             "select_slider_range",
             options=["a", "b", "c"],
             value=["a", "b"],
             key="select_slider_range",
         )
-        check_roundtrip("select_slider_range", select_slider_range)
+        _batch_check_roundtrip(
+            [
+                ("select_slider", select_slider),
+                ("select_slider_range", select_slider_range),
+            ]
+        )
 
     def test_slider_serde(self):
         slider = st.slider("slider", key="slider")
-        check_roundtrip("slider", slider)
-
         slider_float = st.slider("slider_float", value=0.5, key="slider_float")
-        check_roundtrip("slider_float", slider_float)
-
         slider_date = st.slider(
             "slider_date",
             value=date.today(),
             key="slider_date",
         )
-        check_roundtrip("slider_date", slider_date)
-
         slider_time = st.slider(
             "slider_time",
             value=datetime.now().time(),
             key="slider_time",
         )
-        check_roundtrip("slider_time", slider_time)
-
         slider_datetime = st.slider(
             "slider_datetime",
             value=datetime.now(),
             key="slider_datetime",
         )
-        check_roundtrip("slider_datetime", slider_datetime)
-
         slider_interval = st.slider(
             "slider_interval",
             value=[-1.0, 1.0],
             key="slider_interval",
         )
-        check_roundtrip("slider_interval", slider_interval)
+        _batch_check_roundtrip(
+            [
+                ("slider", slider),
+                ("slider_float", slider_float),
+                ("slider_date", slider_date),
+                ("slider_time", slider_time),
+                ("slider_datetime", slider_datetime),
+                ("slider_interval", slider_interval),
+            ]
+        )
 
     def test_text_area_serde(self):
         text_area = st.text_area("text_area", key="text_area")
-        check_roundtrip("text_area", text_area)
-
         text_area_default = st.text_area(
             "text_area_default",
             value="default",
             key="text_area_default",
         )
-        check_roundtrip("text_area_default", text_area_default)
+        _batch_check_roundtrip(
+            [("text_area", text_area), ("text_area_default", text_area_default)]
+        )
 
     def test_text_input_serde(self):
         text_input = st.text_input("text_input", key="text_input")
-        check_roundtrip("text_input", text_input)
-
         text_input_default = st.text_input(
             "text_input_default",
             value="default",
             key="text_input_default",
         )
-        check_roundtrip("text_input_default", text_input_default)
+        _batch_check_roundtrip(
+            [("text_input", text_input), ("text_input_default", text_input_default)]
+        )
 
     def test_time_input_serde(self):
         time = st.time_input("time", key="time")
-        check_roundtrip("time", time)
-
         time_datetime = st.time_input(
             "datetime",
             value=datetime.now(),
             key="time_datetime",
         )
-        check_roundtrip("time_datetime", time_datetime)
+        _batch_check_roundtrip([("time", time), ("time_datetime", time_datetime)])
 
 
 def _compact_copy(state: SessionState) -> SessionState:
     """Return a compacted copy of the given SessionState."""
-    state_copy = deepcopy(state)
+    state_copy = state._snapshot()
     state_copy._compact_state()
     return state_copy
 
@@ -583,6 +689,19 @@ class SessionStateMethodTests(unittest.TestCase):
         assert self.session_state._new_session_state == {}
         assert self.session_state._new_widget_state == WStates()
 
+    def test_snapshot_is_independent(self):
+        snapshot = self.session_state._snapshot()
+        assert snapshot == self.session_state
+
+        snapshot._compact_state()
+        assert self.session_state._new_session_state == {"foo": "bar2"}
+        assert len(self.session_state._new_widget_state) == 2
+        assert self.session_state._old_state == {
+            "foo": "bar",
+            "baz": "qux",
+            "corge": "grault",
+        }
+
     # https://github.com/streamlit/streamlit/issues/7206
     def test_ignore_key_error_within_compact_state(self):
         wstates = WStates()
@@ -706,16 +825,16 @@ class SessionStateMethodTests(unittest.TestCase):
         wstates.set_widget_metadata(
             WidgetMetadata(
                 id=existing_widget_key,
-                deserializer=lambda x, s: str(x),
-                serializer=lambda x: bool(x),
+                deserializer=_str_deser,
+                serializer=bool,
                 value_type="bool_value",
             )
         )
         wstates.set_widget_metadata(
             WidgetMetadata(
                 id=generated_widget_key,
-                deserializer=lambda x, s: str(x),
-                serializer=lambda x: bool(x),
+                deserializer=_str_deser,
+                serializer=bool,
                 value_type="bool_value",
             )
         )
@@ -760,6 +879,14 @@ class SessionStateMethodTests(unittest.TestCase):
         with pytest.raises(UnserializableSessionStateError):
             self.session_state._check_serializable()
 
+    def test_detect_unserializable_in_container(self):
+        self.session_state["serializable"] = {"a": [1, 2.0, "three", None]}
+        self.session_state._check_serializable()
+
+        self.session_state["unserializable"] = {"a": [1, lambda x: x]}
+        with pytest.raises(UnserializableSessionStateError):
+            self.session_state._check_serializable()
+
 
 @given(state=stst.session_state())
 @settings(deadline=400)
@@ -842,8 +969,8 @@ class IsStaleWidgetTests(unittest.TestCase):
     def test_is_stale_widget_active_id(self):
         metadata = WidgetMetadata(
             id="widget_id_1",
-            deserializer=lambda x, s: str(x),
-            serializer=lambda x: int(x),
+            deserializer=_str_deser,
+            serializer=_int_ser,
             value_type="int_value",
         )
         assert not _is_stale_widget(metadata, {"widget_id_1"}, {})
@@ -851,8 +978,8 @@ class IsStaleWidgetTests(unittest.TestCase):
     def test_is_stale_widget_unrelated_fragment(self):
         metadata = WidgetMetadata(
             id="widget_id_1",
-            deserializer=lambda x, s: str(x),
-            serializer=lambda x: int(x),
+            deserializer=_str_deser,
+            serializer=_int_ser,
             value_type="int_value",
             fragment_id="my_fragment",
         )
@@ -861,8 +988,8 @@ class IsStaleWidgetTests(unittest.TestCase):
     def test_is_stale_widget_actually_stale_fragment(self):
         metadata = WidgetMetadata(
             id="widget_id_1",
-            deserializer=lambda x, s: str(x),
-            serializer=lambda x: int(x),
+            deserializer=_str_deser,
+            serializer=_int_ser,
             value_type="int_value",
             fragment_id="my_fragment",
         )
@@ -871,14 +998,19 @@ class IsStaleWidgetTests(unittest.TestCase):
     def test_is_stale_widget_actually_stale_no_fragment(self):
         metadata = WidgetMetadata(
             id="widget_id_1",
-            deserializer=lambda x, s: str(x),
-            serializer=lambda x: int(x),
+            deserializer=_str_deser,
+            serializer=_int_ser,
             value_type="int_value",
             fragment_id="my_fragment",
         )
         assert _is_stale_widget(metadata, {"widget_id_2"}, {})
 
 
+def _session_state_size(state: SessionState) -> int:
+    """Return the byte length that SessionState.get_stats reports for state."""
+    return state.get_stats()[0].byte_length
+
+
 class SessionStateStatProviderTests(DeltaGeneratorTestCase):
     def test_session_state_stats(self):
         # TODO: document the values used here. They're somewhat arbitrary -
@@ -896,61 +1028,66 @@ class SessionStateStatProviderTests(DeltaGeneratorTestCase):
         assert init_size < expected_session_state_size_bytes
 
         state["foo"] = 2
-        new_size = state.get_stats()[0].byte_length
+        new_size = _session_state_size(state)
         assert new_size > init_size
         assert new_size < expected_session_state_size_bytes
 
         state["foo"] = 1
-        new_size_2 = state.get_stats()[0].byte_length
+        new_size_2 = _session_state_size(state)
         assert new_size_2 == new_size
 
-        st.checkbox("checkbox", key="checkbox")
-        new_size_3 = state.get_stats()[0].byte_length
+        # Register the widget directly, since only its footprint in the
+        # session state matters here, not rendering it.
+        state.register_widget(
+            WidgetMetadata(
+                id=f"{GENERATED_ELEMENT_ID_PREFIX}-checkbox",
+                deserializer=_identity_deser,
+                serializer=identity,
+                value_type="bool_value",
+            ),
+            user_key="checkbox",
+        )
+        new_size_3 = _session_state_size(state)
         assert new_size_3 > new_size_2
         assert new_size_3 - new_size_2 < expected_session_state_size_bytes
 
         state._compact_state()
-        new_size_4 = state.get_stats()[0].byte_length
+        new_size_4 = _session_state_size(state)
         assert new_size_4 <= new_size_3
 
 
 class KeyIdMapperTest(unittest.TestCase):
+    def setUp(self):
+        self.key_id_mapper = KeyIdMapper()
+        self.key_id_mapper.set_key_id_mapping({"key": "wid"})
+
     def test_key_id_mapping(self):
-        key_id_mapper = KeyIdMapper()
-        key_id_mapper.set_key_id_mapping({"key": "wid"})
+        key_id_mapper = self.key_id_mapper
         assert key_id_mapper.get_id_from_key("key") == "wid"
         assert key_id_mapper.get_key_from_id("wid") == "key"
 
     def test_key_id_mapping_errors(self):
-        key_id_mapper = KeyIdMapper()
-        key_id_mapper.set_key_id_mapping({"key": "wid"})
+        key_id_mapper = self.key_id_mapper
         assert key_id_mapper.get_id_from_key("nonexistent") is None
         with pytest.raises(KeyError):
             key_id_mapper.get_key_from_id("nonexistent")
 
     def test_key_id_mapping_clear(self):
-        key_id_mapper = KeyIdMapper()
-        key_id_mapper.set_key_id_mapping({"key": "wid"})
-        assert key_id_mapper.get_id_from_key("key") == "wid"
-        assert key_id_mapper.get_key_from_id("wid") == "key"
+        key_id_mapper = self.key_id_mapper
         key_id_mapper.clear()
         assert key_id_mapper.get_id_from_key("key") is None
         with pytest.raises(KeyError):
             key_id_mapper.get_key_from_id("wid")
 
     def test_key_id_mapping_delete(self):
-        key_id_mapper = KeyIdMapper()
-        key_id_mapper.set_key_id_mapping({"key": "wid"})
-        assert key_id_mapper.get_id_from_key("key") == "wid"
-        assert key_id_mapper.get_key_from_id("wid") == "key"
+        key_id_mapper = self.key_id_mapper
         del key_id_mapper["key"]
         assert key_id_mapper.get_id_from_key("key") is None
         with pytest.raises(KeyError):
             key_id_mapper.get_key_from_id("wid")
 
     def test_key_id_mapping_set_key_id_mapping(self):
-        key_id_mapper = KeyIdMapper()
-        key_id_mapper.set_key_id_mapping({"key": "wid"})
+        key_id_mapper = self.key_id_mapper
         key_id_mapper["key2"] = "wid2"
         assert key_id_mapper.get_id_from_key("key") == "wid"
         assert key_id_mapper.get_key_from_id("wid") == "key"
@@ -958,11 +1095,7 @@ class KeyIdMapperTest(unittest.TestCase):
         assert key_id_mapper.get_key_from_id("wid2") == "key2"
 
     def test_key_id_mapping_update(self):
-        key_id_mapper = KeyIdMapper()
-        key_id_mapper.set_key_id_mapping({"key": "wid"})
-        assert key_id_mapper.get_id_from_key("key") == "wid"
-        assert key_id_mapper.get_key_from_id("wid") == "key"
-
+        key_id_mapper = self.key_id_mapper
         key_id_mapper2 = KeyIdMapper()
         key_id_mapper2.set_key_id_mapping({"key2": "wid2"})
         key_id_mapper.update(key_id_mapper2)
@@ -974,7 +1107,8 @@ class KeyIdMapperTest(unittest.TestCase):
         key_id_mapper.update(key_id_mapper3)
         assert key_id_mapper.get_id_from_key("key") == "wid3"
         assert key_id_mapper.get_key_from_id("wid3") == "key"
+        # Updating an existing key leaves unrelated mappings untouched ...
         assert key_id_mapper.get_id_from_key("key2") == "wid2"
         assert key_id_mapper.get_key_from_id("wid2") == "key2"
-        assert key_id_mapper.get_id_from_key("key") == "wid3"
+        # ... and doesn't prune the reverse mapping of the overwritten id.
         assert key_id_mapper.get_key_from_id("wid") == "key"